@@ -1,23 +1,33 @@
 #!/usr/bin/env python3
 """
 Check domain availability via RDAP with resume capability.
+Runs checks concurrently over a shared aiohttp session so wall time is
+bounded by rate limiting, not by per-request latency.
 Saves progress every 100 checks so it can resume after interruption.
 
 Usage:
-    python check_availability.py [--tld ai] [--rate 30]
+    python check_availability.py [--tld ai] [--rate 30] [--concurrency 10]
 
 Options:
     --tld: TLD to check (default: ai)
     --rate: Checks per minute (default: 30)
+    --concurrency: Max in-flight RDAP requests (default: 10)
 """
 
-import requests
+import aiohttp
+import asyncio
+import orjson
+import os
+import sqlite3
 import time
-import json
 import argparse
+from asyncio_throttle import Throttler
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
+from urllib.parse import urlsplit
+
+from generate_patterns import iter_patterns
 
 # RDAP endpoints by TLD
 RDAP_ENDPOINTS = {
@@ -27,12 +37,24 @@ RDAP_ENDPOINTS = {
     'net': 'https://rdap.verisign.com/net/v1/domain/',
 }
 
+# Retry transient failures with exponential backoff; RDAP endpoints
+# rate-limit with 429 and can return 5xx under load.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
 # File paths
 PATTERNS_FILE = 'patterns.txt'
 CHECKPOINT_FILE = 'checkpoint_{tld}.json'
+CHECKPOINT_BIN = 'checkpoint_{tld}.bin'
 AVAILABLE_FILE = 'available_{tld}.txt'
 TAKEN_FILE = 'taken_{tld}.txt'
 LOG_FILE = 'check_{tld}.log'
+CACHE_FILE = 'rdap_cache.db'
+
+# Cache TTLs: available results are very stable, taken ones can flip back
+AVAILABLE_TTL = 7 * 86400
+TAKEN_TTL = 3600
 
 
 def log(message: str, tld: str):
@@ -44,13 +66,22 @@ def log(message: str, tld: str):
         f.write(log_line + '\n')
 
 
+def count_lines(path: str) -> int:
+    """Count lines in a file (0 if missing)."""
+    if not Path(path).exists():
+        return 0
+    with open(path, 'rb') as f:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+
+
 def load_checkpoint(tld: str) -> dict:
-    """Load checkpoint or return default state."""
-    checkpoint_path = Path(CHECKPOINT_FILE.format(tld=tld))
-    if checkpoint_path.exists():
-        with open(checkpoint_path) as f:
-            return json.load(f)
-    return {
+    """
+    Load checkpoint or return default state.
+    last_index comes from the binary checkpoint (updated every interval);
+    the available/taken counters are recounted from the output files, so
+    the JSON summary only has to be written at shutdown.
+    """
+    state = {
         'last_index': 0,
         'checked': 0,
         'available': 0,
@@ -58,16 +89,62 @@ def load_checkpoint(tld: str) -> dict:
         'errors': 0,
         'started_at': datetime.now().isoformat(),
     }
+    checkpoint_path = Path(CHECKPOINT_FILE.format(tld=tld))
+    if checkpoint_path.exists():
+        state.update(orjson.loads(checkpoint_path.read_bytes()))
+    bin_path = Path(CHECKPOINT_BIN.format(tld=tld))
+    if bin_path.exists():
+        # The file is created empty at startup and only written at the
+        # first interval; a short read means it never got a checkpoint,
+        # so keep the JSON value instead of silently resuming from 0
+        data = bin_path.read_bytes()
+        if len(data) >= 8:
+            state['last_index'] = int.from_bytes(data[:8], 'little')
+    state['available'] = count_lines(AVAILABLE_FILE.format(tld=tld))
+    state['taken'] = count_lines(TAKEN_FILE.format(tld=tld))
+    state['checked'] = max(state['checked'], state['available'] + state['taken'])
+    return state
 
 
 def save_checkpoint(state: dict, tld: str):
-    """Save checkpoint state."""
+    """Save checkpoint state atomically (write temp file, then rename)."""
     state['updated_at'] = datetime.now().isoformat()
-    with open(CHECKPOINT_FILE.format(tld=tld), 'w') as f:
-        json.dump(state, f, indent=2)
-
-
-def check_rdap(domain: str, tld: str) -> Optional[bool]:
+    checkpoint_path = CHECKPOINT_FILE.format(tld=tld)
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(state, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, checkpoint_path)
+
+
+def open_cache() -> sqlite3.Connection:
+    """Open (or create) the local RDAP result cache."""
+    conn = sqlite3.connect(CACHE_FILE, isolation_level=None)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS rdap_cache('
+        'domain TEXT PRIMARY KEY, status INT, expires INT)'
+    )
+    return conn
+
+
+def cache_lookup(cache: sqlite3.Connection, domain: str) -> Optional[bool]:
+    """Return the cached availability result, or None on miss/expiry."""
+    row = cache.execute(
+        'SELECT status FROM rdap_cache WHERE domain=? AND expires>?',
+        (domain, int(time.time()))
+    ).fetchone()
+    return None if row is None else bool(row[0])
+
+
+def cache_store(cache: sqlite3.Connection, domain: str, status: bool):
+    """Cache an availability result (errors are never cached)."""
+    ttl = AVAILABLE_TTL if status else TAKEN_TTL
+    cache.execute(
+        'INSERT OR REPLACE INTO rdap_cache(domain, status, expires) VALUES (?, ?, ?)',
+        (domain, int(status), int(time.time()) + ttl)
+    )
+
+
+async def check_rdap(session: aiohttp.ClientSession, domain: str, tld: str) -> Optional[bool]:
     """
     Check domain availability via RDAP.
     Returns: True if available, False if taken, None if error.
@@ -76,101 +153,186 @@ def check_rdap(domain: str, tld: str) -> Optional[bool]:
     if not endpoint:
         raise ValueError(f"Unknown TLD: {tld}")
 
-    try:
-        response = requests.get(
-            f"{endpoint}{domain}",
-            timeout=10,
-            headers={'Accept': 'application/rdap+json'}
-        )
-
-        if response.status_code == 404:
-            return True  # Available
-        elif response.status_code == 200:
-            return False  # Taken
-        else:
-            return None  # Error
-
-    except requests.exceptions.Timeout:
-        return None
-    except requests.exceptions.RequestException:
-        return None
-
-
-def main():
-    parser = argparse.ArgumentParser(description='Check domain availability')
-    parser.add_argument('--tld', default='ai', help='TLD to check (default: ai)')
-    parser.add_argument('--rate', type=int, default=30, help='Checks per minute (default: 30)')
-    parser.add_argument('--limit', type=int, default=0, help='Max domains to check (0=unlimited)')
-    args = parser.parse_args()
-
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with session.get(
+                f"{endpoint}{domain}",
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers={'Accept': 'application/rdap+json'}
+            ) as response:
+
+                if response.status == 404:
+                    return True  # Available
+                elif response.status == 200:
+                    return False  # Taken
+                elif response.status == 429 and attempt < MAX_RETRIES:
+                    # The registry said exactly how long to back off; honor
+                    # it instead of the generic exponential schedule
+                    try:
+                        retry_after = float(response.headers.get('Retry-After', ''))
+                    except ValueError:
+                        retry_after = BACKOFF_FACTOR * 2 ** attempt
+                    await asyncio.sleep(max(retry_after, 0))
+                    continue
+                elif response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    return None  # Error
+
+        except asyncio.TimeoutError:
+            if attempt == MAX_RETRIES:
+                return None
+        except aiohttp.ClientError:
+            if attempt == MAX_RETRIES:
+                return None
+
+        await asyncio.sleep(BACKOFF_FACTOR * 2 ** attempt)
+
+    return None
+
+
+async def run(args):
     tld = args.tld
     rate = args.rate
-    delay = 60.0 / rate  # Seconds between checks
-
-    # Load patterns
-    if not Path(PATTERNS_FILE).exists():
-        print(f"Error: {PATTERNS_FILE} not found. Run generate_patterns.py first.")
-        return
-
-    with open(PATTERNS_FILE) as f:
-        patterns = [line.strip() for line in f if line.strip()]
 
-    total_patterns = len(patterns)
-    log(f"Loaded {total_patterns:,} patterns", tld)
+    # patterns.txt stays authoritative when present — checkpoints index
+    # into it, and it is not necessarily generator output (the live one is
+    # an English word list). Only generate in-process when it is absent.
+    if Path(PATTERNS_FILE).exists():
+        with open(PATTERNS_FILE) as f:
+            patterns = [line.strip() for line in f if line.strip()]
+        total_patterns = len(patterns)
+        log(f"Loaded {total_patterns:,} patterns from {PATTERNS_FILE}", tld)
+    else:
+        patterns = list(iter_patterns())
+        total_patterns = len(patterns)
+        log(f"Generated {total_patterns:,} patterns in-process", tld)
 
     # Load checkpoint
     state = load_checkpoint(tld)
     start_index = state['last_index']
     log(f"Resuming from index {start_index:,} ({start_index/total_patterns*100:.1f}%)", tld)
 
+    # Fill the work queue up front; workers drain it concurrently
+    queue: asyncio.Queue = asyncio.Queue()
+    results: asyncio.Queue = asyncio.Queue()
+    remaining = patterns[start_index:]
+    if args.limit:
+        budget = max(args.limit - state['checked'], 0)
+        remaining = remaining[:budget]
+    for i, word in enumerate(remaining, start=start_index):
+        queue.put_nowait((i, word))
+
     # Open output files in append mode
     available_file = open(AVAILABLE_FILE.format(tld=tld), 'a')
     taken_file = open(TAKEN_FILE.format(tld=tld), 'a')
 
-    try:
-        for i, word in enumerate(patterns[start_index:], start=start_index):
-            if args.limit and state['checked'] >= args.limit:
-                log(f"Reached limit of {args.limit} checks", tld)
-                break
+    cache = open_cache()
+
+    # Hot-path checkpoint: one 8-byte pwrite at offset 0 per interval, no
+    # JSON serialization and no rename
+    ckpt_fd = os.open(CHECKPOINT_BIN.format(tld=tld), os.O_WRONLY | os.O_CREAT, 0o644)
 
+    # Completion can be out of order; only advance last_index over a
+    # contiguous run of finished indices so resume never skips a domain.
+    frontier = start_index
+    completed: set = set()
+
+    # Token bucket: --rate requests per minute regardless of how long each
+    # request takes, unlike a fixed sleep between checks
+    throttler = Throttler(rate_limit=rate, period=60)
+
+    async def worker(session: aiohttp.ClientSession):
+        while True:
+            item = await queue.get()
+            if item is None:
+                queue.task_done()
+                break
+            i, word = item
             domain = f"{word}.{tld}"
-            result = check_rdap(domain, tld)
+            # Cache hits skip both the network and the rate limiter
+            cached = cache_lookup(cache, domain)
+            if cached is not None:
+                await results.put((i, domain, cached))
+                queue.task_done()
+                continue
+            async with throttler:
+                result = await check_rdap(session, domain, tld)
+            if result is not None:
+                cache_store(cache, domain, result)
+            await results.put((i, domain, result))
+            queue.task_done()
+
+    async def write_results():
+        # Single writer task so file writes stay serialized
+        nonlocal frontier
+        while True:
+            item = await results.get()
+            if item is None:
+                results.task_done()
+                break
+            i, domain, result = item
 
             if result is True:
                 available_file.write(domain + '\n')
-                available_file.flush()
                 state['available'] += 1
-                status = "AVAILABLE"
             elif result is False:
                 taken_file.write(domain + '\n')
-                taken_file.flush()
                 state['taken'] += 1
-                status = "taken"
             else:
                 state['errors'] += 1
-                status = "ERROR"
 
             state['checked'] += 1
-            state['last_index'] = i + 1
+            completed.add(i)
+            while frontier in completed:
+                completed.remove(frontier)
+                frontier += 1
+            state['last_index'] = frontier
 
             # Progress log every 100
             if state['checked'] % 100 == 0:
-                pct = i / total_patterns * 100
+                pct = frontier / total_patterns * 100
                 avail_rate = state['available'] / state['checked'] * 100 if state['checked'] > 0 else 0
-                log(f"Progress: {i:,}/{total_patterns:,} ({pct:.1f}%) | "
+                log(f"Progress: {frontier:,}/{total_patterns:,} ({pct:.1f}%) | "
                     f"Available: {state['available']:,} ({avail_rate:.1f}%) | "
                     f"Errors: {state['errors']}", tld)
-                save_checkpoint(state, tld)
+                # Flush outputs once per interval so the checkpoint never
+                # points past what is actually on disk
+                available_file.flush()
+                taken_file.flush()
+                os.pwrite(ckpt_fd, frontier.to_bytes(8, 'little'), 0)
 
-            # Rate limiting
-            time.sleep(delay)
+            results.task_done()
 
-    except KeyboardInterrupt:
-        log("Interrupted by user. Saving checkpoint...", tld)
+    # All requests hit one static host: resolve it once up front (fails fast
+    # if DNS is broken) and let the connector cache the answer for the run
+    endpoint_host = urlsplit(RDAP_ENDPOINTS.get(tld, '')).hostname
+    if endpoint_host:
+        try:
+            await asyncio.get_running_loop().getaddrinfo(endpoint_host, 443)
+        except OSError:
+            log(f"Warning: could not resolve {endpoint_host}", tld)
+
+    connector = aiohttp.TCPConnector(
+        limit_per_host=64,
+        use_dns_cache=True,
+        ttl_dns_cache=86400,
+    )
+
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            workers = [asyncio.create_task(worker(session)) for _ in range(args.concurrency)]
+            writer = asyncio.create_task(write_results())
+            for _ in workers:
+                queue.put_nowait(None)
+            await asyncio.gather(*workers)
+            await results.put(None)
+            await writer
     finally:
+        os.pwrite(ckpt_fd, frontier.to_bytes(8, 'little'), 0)
+        os.close(ckpt_fd)
         save_checkpoint(state, tld)
         available_file.close()
         taken_file.close()
+        cache.close()
 
     # Final summary
     log("=" * 50, tld)
@@ -183,5 +345,20 @@ def main():
     log("=" * 50, tld)
 
 
+def main():
+    parser = argparse.ArgumentParser(description='Check domain availability')
+    parser.add_argument('--tld', default='ai', help='TLD to check (default: ai)')
+    parser.add_argument('--rate', type=int, default=30, help='Checks per minute (default: 30)')
+    parser.add_argument('--limit', type=int, default=0, help='Max domains to check (0=unlimited)')
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help='Max in-flight RDAP requests (default: 10)')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\nInterrupted by user. Checkpoint saved.")
+
+
 if __name__ == '__main__':
     main()
@@ -4,9 +4,11 @@ Generate phonetically valid, brandable word patterns.
 Outputs to patterns.txt - one word per line.
 """
 
-import itertools
-from typing import Generator
-import sys
+import multiprocessing as mp
+import os
+import re
+import numpy as np
+from typing import Iterator, List
 
 # Good consonants (removed q, x which rarely appear in brandable words)
 CONSONANTS = list('bcdfghjklmnprstvwz')
@@ -28,6 +30,12 @@ END_CLUSTERS = [
     'rk', 'rl', 'rm', 'rn', 'rp', 'rt', 'sh', 'sk', 'sp', 'st', 'th'
 ]
 
+# End clusters that also work mid-word (for CVCCV)
+MID_CLUSTERS = [
+    'ld', 'lf', 'lk', 'lm', 'lp', 'lt', 'mp', 'nd', 'ng', 'nk',
+    'nt', 'rb', 'rd', 'rg', 'rk', 'rm', 'rn', 'rp', 'rt'
+]
+
 # Bad patterns to filter out
 BAD_PATTERNS = {
     # Double letters that look weird
@@ -38,109 +46,154 @@ BAD_PATTERNS = {
     'jr', 'rj', 'wj', 'jw', 'zj', 'jz',
 }
 
+# uint8 encodings for the vectorized kernels
+_CONS_U8 = np.frombuffer(''.join(CONSONANTS).encode(), dtype=np.uint8)
+_VOWEL_U8 = np.frombuffer(''.join(VOWELS).encode(), dtype=np.uint8)
+_BAD_PAIRS_U16 = np.array(
+    sorted((ord(bad[0]) << 8) | ord(bad[1]) for bad in BAD_PATTERNS),
+    dtype=np.uint16
+)
+
+
+# One regex for everything is_pronounceable rejects: bad patterns,
+# triple consonants, triple vowels. A single C-level scan per word.
+_BAD_RE = re.compile(
+    '|'.join(map(re.escape, sorted(BAD_PATTERNS)))
+    + f"|[{''.join(CONSONANTS)}]{{3}}"
+    + f"|[{''.join(VOWELS)}]{{3}}"
+)
+
 
 def is_pronounceable(word: str) -> bool:
     """Filter out unpronounceable combinations."""
-    word = word.lower()
-
-    # Check for bad patterns
-    for bad in BAD_PATTERNS:
-        if bad in word:
-            return False
-
-    # No triple consonants
-    consonant_count = 0
-    for char in word:
-        if char in CONSONANTS:
-            consonant_count += 1
-            if consonant_count >= 3:
-                return False
-        else:
-            consonant_count = 0
-
-    # No triple vowels
-    vowel_count = 0
-    for char in word:
-        if char in VOWELS:
-            vowel_count += 1
-            if vowel_count >= 3:
-                return False
-        else:
-            vowel_count = 0
-
-    return True
-
-
-def generate_cvcv() -> Generator[str, None, None]:
+    return _BAD_RE.search(word.lower()) is None
+
+
+def _cartesian(parts: List[List[str]]) -> np.ndarray:
+    """
+    Cartesian product of letter groups as an (N, width) uint8 char matrix.
+    Each part is a list of equal-length strings (single letters or clusters).
+    """
+    arrays = [
+        np.frombuffer(''.join(part).encode(), dtype=np.uint8).reshape(len(part), -1)
+        for part in parts
+    ]
+    grids = np.meshgrid(*(np.arange(len(a)) for a in arrays), indexing='ij')
+    return np.concatenate(
+        [a[g.ravel()] for a, g in zip(arrays, grids)],
+        axis=1
+    )
+
+
+def _pronounceable_mask(arr: np.ndarray) -> np.ndarray:
+    """Vectorized is_pronounceable over an (N, k) uint8 char matrix."""
+    n, k = arr.shape
+    mask = np.ones(n, dtype=bool)
+
+    # Check for bad patterns (all are bigrams)
+    for j in range(k - 1):
+        pairs = (arr[:, j].astype(np.uint16) << 8) | arr[:, j + 1]
+        mask &= ~np.isin(pairs, _BAD_PAIRS_U16)
+
+    # No triple consonants / triple vowels
+    is_cons = np.isin(arr, _CONS_U8)
+    is_vowel = np.isin(arr, _VOWEL_U8)
+    for j in range(k - 2):
+        mask &= ~(is_cons[:, j] & is_cons[:, j + 1] & is_cons[:, j + 2])
+        mask &= ~(is_vowel[:, j] & is_vowel[:, j + 1] & is_vowel[:, j + 2])
+
+    return mask
+
+
+# Packed word width: every candidate is <= 6 ASCII chars, so it fits a
+# uint64 with room to spare. First char goes in the most significant
+# byte and unused bytes stay zero, which makes numeric order on the
+# codes identical to lexicographic order on the words.
+_WORD_WIDTH = 8
+
+
+def _pack_codes(arr: np.ndarray) -> np.ndarray:
+    """Pack an (N, k) uint8 char matrix into uint64 word codes."""
+    codes = np.zeros(len(arr), dtype=np.uint64)
+    for j in range(arr.shape[1]):
+        codes |= arr[:, j].astype(np.uint64) << np.uint64(8 * (_WORD_WIDTH - 1 - j))
+    return codes
+
+
+def _render_lines(codes: np.ndarray) -> bytes:
+    """Render packed word codes as newline-terminated bytes, in order."""
+    rows = codes.astype('>u8').view(np.uint8).reshape(-1, _WORD_WIDTH)
+    out = np.zeros((len(codes), _WORD_WIDTH + 1), dtype=np.uint8)
+    out[:, :_WORD_WIDTH] = rows
+    lengths = (rows != 0).sum(axis=1)
+    out[np.arange(len(codes)), lengths] = ord('\n')
+    flat = out.ravel()
+    return flat[flat != 0].tobytes()
+
+
+def _generate(parts: List[List[str]]) -> np.ndarray:
+    """Materialize one pattern's pronounceable words as packed codes."""
+    arr = _cartesian(parts)
+    return _pack_codes(arr[_pronounceable_mask(arr)])
+
+
+def generate_cvcv() -> np.ndarray:
     """Generate CVCV patterns (4 letters): zova, bira, melo"""
-    for c1 in CONSONANTS:
-        for v1 in VOWELS:
-            for c2 in CONSONANTS:
-                for v2 in VOWELS:
-                    word = c1 + v1 + c2 + v2
-                    if is_pronounceable(word):
-                        yield word
+    return _generate([CONSONANTS, VOWELS, CONSONANTS, VOWELS])
 
 
-def generate_cvcvc() -> Generator[str, None, None]:
+def generate_cvcvc() -> np.ndarray:
     """Generate CVCVC patterns (5 letters): zovax, birak"""
-    for c1 in CONSONANTS:
-        for v1 in VOWELS:
-            for c2 in CONSONANTS:
-                for v2 in VOWELS:
-                    for c3 in CONSONANTS:
-                        word = c1 + v1 + c2 + v2 + c3
-                        if is_pronounceable(word):
-                            yield word
+    return _generate([CONSONANTS, VOWELS, CONSONANTS, VOWELS, CONSONANTS])
 
 
-def generate_ccvcv() -> Generator[str, None, None]:
+def generate_ccvcv() -> np.ndarray:
     """Generate CCVCV patterns (5 letters): blaze, crivo"""
-    for cc in START_CLUSTERS:
-        for v1 in VOWELS:
-            for c in CONSONANTS:
-                for v2 in VOWELS:
-                    word = cc + v1 + c + v2
-                    if is_pronounceable(word):
-                        yield word
+    return _generate([START_CLUSTERS, VOWELS, CONSONANTS, VOWELS])
 
 
-def generate_cvccv() -> Generator[str, None, None]:
+def generate_cvccv() -> np.ndarray:
     """Generate CVCCV patterns (5 letters): bolta, melpa"""
-    for c1 in CONSONANTS:
-        for v1 in VOWELS:
-            for cc in END_CLUSTERS:
-                for v2 in VOWELS:
-                    # Only use end clusters that work mid-word
-                    if cc in ['ld', 'lf', 'lk', 'lm', 'lp', 'lt', 'mp', 'nd', 'ng', 'nk', 'nt', 'rb', 'rd', 'rg', 'rk', 'rm', 'rn', 'rp', 'rt']:
-                        word = c1 + v1 + cc + v2
-                        if is_pronounceable(word):
-                            yield word
-
-
-def generate_cvcvcv() -> Generator[str, None, None]:
+    return _generate([CONSONANTS, VOWELS, MID_CLUSTERS, VOWELS])
+
+
+def generate_cvcvcv() -> np.ndarray:
     """Generate CVCVCV patterns (6 letters): banana, zenova"""
-    for c1 in CONSONANTS:
-        for v1 in VOWELS:
-            for c2 in CONSONANTS:
-                for v2 in VOWELS:
-                    for c3 in CONSONANTS:
-                        for v3 in VOWELS:
-                            word = c1 + v1 + c2 + v2 + c3 + v3
-                            if is_pronounceable(word):
-                                yield word
-
-
-def generate_ccvcvc() -> Generator[str, None, None]:
+    return _generate([CONSONANTS, VOWELS, CONSONANTS, VOWELS, CONSONANTS, VOWELS])
+
+
+def generate_ccvcvc() -> np.ndarray:
     """Generate CCVCVC patterns (6 letters): blazer, crispy"""
-    for cc in START_CLUSTERS:
-        for v1 in VOWELS:
-            for c in CONSONANTS:
-                for v2 in VOWELS:
-                    for c2 in CONSONANTS:
-                        word = cc + v1 + c + v2 + c2
-                        if is_pronounceable(word):
-                            yield word
+    return _generate([START_CLUSTERS, VOWELS, CONSONANTS, VOWELS, CONSONANTS])
+
+
+# Pattern name -> generator; also the dispatch table for pool workers
+PATTERN_GENERATORS = {
+    'CVCV (4)': generate_cvcv,
+    'CVCVC (5)': generate_cvcvc,
+    'CCVCV (5)': generate_ccvcv,
+    'CVCCV (5)': generate_cvccv,
+    'CVCVCV (6)': generate_cvcvcv,
+    'CCVCVC (6)': generate_ccvcvc,
+}
+
+
+def run_generator(pattern_name: str) -> np.ndarray:
+    """Materialize one pattern's packed word codes (runs in a pool worker)."""
+    return PATTERN_GENERATORS[pattern_name]()
+
+
+def all_codes() -> np.ndarray:
+    """Unique packed codes across all patterns, sorted (np.unique sorts)."""
+    return np.unique(np.concatenate([gen() for gen in PATTERN_GENERATORS.values()]))
+
+
+def iter_patterns() -> Iterator[str]:
+    """
+    All unique patterns in sorted order — the same order as patterns.txt,
+    so consumers that track progress by index can use either source.
+    """
+    return iter(_render_lines(all_codes()).decode().splitlines())
 
 
 def main():
@@ -149,43 +202,36 @@ def main():
     print("Generating phonetically valid patterns...")
     print("=" * 50)
 
-    patterns = {
-        'CVCV (4)': generate_cvcv,
-        'CVCVC (5)': generate_cvcvc,
-        'CCVCV (5)': generate_ccvcv,
-        'CVCCV (5)': generate_cvccv,
-        'CVCVCV (6)': generate_cvcvcv,
-        'CCVCVC (6)': generate_ccvcvc,
-    }
+    # The six patterns are independent; generate them in parallel
+    names = list(PATTERN_GENERATORS)
+    with mp.Pool(processes=min(len(names), os.cpu_count())) as pool:
+        results = pool.map(run_generator, names)
 
     total = 0
-    all_words = set()  # Deduplicate
-
-    for pattern_name, generator in patterns.items():
-        count = 0
-        for word in generator():
-            if word not in all_words:
-                all_words.add(word)
-                count += 1
+    seen = np.empty(0, dtype=np.uint64)  # Deduplicate
+
+    for pattern_name, codes in zip(names, results):
+        uniq = np.unique(codes)
+        count = int(len(uniq) - np.isin(uniq, seen).sum())
+        seen = np.union1d(seen, uniq)
         print(f"{pattern_name}: {count:,} words")
         total += count
 
     print("=" * 50)
-    print(f"Total unique patterns: {len(all_words):,}")
+    print(f"Total unique patterns: {len(seen):,}")
 
-    # Write to file
+    # Write to file in one buffered write instead of one call per word
+    # (seen is already sorted, and code order == word order)
     print(f"\nWriting to {output_file}...")
-    with open(output_file, 'w') as f:
-        for word in sorted(all_words):
-            f.write(word + '\n')
+    with open(output_file, 'wb') as f:
+        f.write(_render_lines(seen))
 
-    print(f"Done! Saved {len(all_words):,} patterns to {output_file}")
+    print(f"Done! Saved {len(seen):,} patterns to {output_file}")
 
     # Show sample
     print("\nSample patterns:")
-    import random
-    sample = random.sample(list(all_words), 20)
-    for word in sorted(sample):
+    sample_idx = np.sort(np.random.default_rng().choice(len(seen), size=20, replace=False))
+    for word in _render_lines(seen[sample_idx]).decode().splitlines():
         print(f"  {word}")
 
 